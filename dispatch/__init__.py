@@ -1,6 +1,6 @@
 """Multi-consumer multi-producer dispatching mechanism"""
 
-from dispatch.dispatcher import Signal, receiver
+from dispatch.dispatcher import Signal, receiver, DispatcherKeyError
 
 VERSION = (3, 0, 0)
 
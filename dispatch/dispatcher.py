@@ -1,15 +1,73 @@
 import weakref
 import threading
+from collections import OrderedDict
 
 from dispatch import saferef
 
+# No longer used here; kept only so code importing the public name still works.
 WEAKREF_TYPES = (weakref.ReferenceType, saferef.BoundMethodWeakref)
 
+class DispatcherKeyError(KeyError):
+    """A signal was sent with arguments it does not provide."""
+
 def _make_id(target):
-    if hasattr(target, 'im_func'):
-        return (id(target.im_self), id(target.im_func))
+    func = getattr(target, '__func__', None)
+    if func is not None:
+        return (id(target.__self__), id(func))
     return id(target)
 
+_NONE_ID = _make_id(None)
+
+_EMPTY_SNAPSHOT = (((), (), ()), None)
+
+class _StrongRef(object):
+    """
+    Reference-like wrapper holding a receiver connected with weak=False.
+
+    Calling it returns the receiver, like calling a live weak reference, so
+    every stored receiver can be resolved the same way.
+    """
+    __slots__ = ('receiver',)
+
+    def __init__(self, receiver):
+        self.receiver = receiver
+
+    def __call__(self):
+        return self.receiver
+
+def _group_append(group, lookup_key, ref):
+    keys, refs = group
+    return (keys + (lookup_key,), refs + (ref,))
+
+def _group_remove(group, lookup_key):
+    keys, refs = group
+    i = keys.index(lookup_key)
+    return (keys[:i] + keys[i + 1:], refs[:i] + refs[i + 1:])
+
+def _make_buckets(keys, refs):
+    """
+    Group receivers by sender key for a snapshot, see Signal._snapshot.
+    """
+    any_keys, any_refs = [], []
+    by_sender = {}
+    for lookup_key, ref in zip(keys, refs):
+        senderkey = lookup_key[1]
+        if senderkey == _NONE_ID:
+            any_keys.append(lookup_key)
+            any_refs.append(ref)
+            for group_keys, group_refs in by_sender.values():
+                group_keys.append(lookup_key)
+                group_refs.append(ref)
+        else:
+            if senderkey not in by_sender:
+                by_sender[senderkey] = (list(any_keys), list(any_refs))
+            group_keys, group_refs = by_sender[senderkey]
+            group_keys.append(lookup_key)
+            group_refs.append(ref)
+    return ((tuple(any_keys), tuple(any_refs)),
+            dict((senderkey, (tuple(group_keys), tuple(group_refs)))
+                 for senderkey, (group_keys, group_refs) in by_sender.items()))
+
 class Signal(object):
     """
     Base class for all signals
@@ -17,20 +75,59 @@ class Signal(object):
     Internal attributes:
 
         receivers
-            { receriverkey (id) : weakref(receiver) }
+            { (receiverkey (id), senderkey (id)) : weakref(receiver) }
+            Receivers connected with weak=False are held by a _StrongRef
+            instead of a weak reference. Kept in connection order. Entries
+            whose weak reference has died are swept out lazily, by
+            _live_receivers() or when connect() reuses their key.
+
+        _snapshot
+            ( (lookup keys, senderkeys, weakref(receiver)s), buckets )
+            An immutable copy of receivers, republished after every change so
+            that sending never needs the lock. The first item holds one tuple
+            per field, indexed in parallel, in connection order.
+
+            buckets is None while there are at most _SMALL_THRESHOLD
+            receivers, otherwise ( any-sender group, { senderkey (id) :
+            group } ) so that sending only visits receivers that can match.
+            A group is a (lookup keys, weakref(receiver)s) pair of tuples.
+            Each sender's group includes the any-sender receivers, in
+            connection order.
+
+        _send_cache
+            { senderkey (id) : ( snapshot, (lookup keys, weakref(receiver)s) ) }
+            The receivers a sender selects from an unbucketed snapshot, so
+            that repeated sends skip the scan. An entry is only used while its
+            snapshot is still the current one; the cache is emptied on every
+            change.
     """
 
-    def __init__(self, providing_args=None):
+    __slots__ = ('receivers', 'providing_args', 'lock', '_validate',
+                 '_snapshot', '_send_cache', '__weakref__')
+
+    # Up to this many receivers a linear scan beats hashing the sender key.
+    _SMALL_THRESHOLD = 5
+
+    # Past this many distinct senders the send cache starts over.
+    _SEND_CACHE_SIZE = 256
+
+    def __init__(self, providing_args=None, validate=False):
         """
         Create a new signal.
 
         providing_args
             A list of the arguments this signal can pass along in a send() call.
+
+        validate
+            If true, send() and send_robust() raise DispatcherKeyError when
+            given arguments that are not in providing_args. The check is
+            skipped when Python runs with -O.
         """
-        self.receivers = []
-        if providing_args is None:
-            providing_args = []
-        self.providing_args = set(providing_args)
+        self.receivers = OrderedDict()
+        self._snapshot = _EMPTY_SNAPSHOT
+        self._send_cache = {}
+        self.providing_args = frozenset(providing_args or ())
+        self._validate = validate and __debug__
         self.lock = threading.Lock()
 
     def connect(self, receiver, sender=None, weak=True, dispatch_uid=None):
@@ -73,16 +170,30 @@ class Signal(object):
         else:
             lookup_key = (_make_id(receiver), _make_id(sender))
 
+        # Reconnecting is common (e.g. modules imported twice); dict lookups
+        # are atomic, so duplicates never need to take the lock. A dead entry
+        # may still hold the key if the id has been reused, so replace it.
+        existing = self.receivers.get(lookup_key)
+        if existing is not None and existing() is not None:
+            return
+
         if weak:
-            receiver = saferef.safeRef(receiver, onDelete=self._remove_receiver)
+            receiver = saferef.safeRef(receiver)
+        else:
+            receiver = _StrongRef(receiver)
 
         self.lock.acquire()
         try:
-            for r_key, _ in self.receivers:
-                if r_key == lookup_key:
-                    break
-            else:
-                self.receivers.append((lookup_key, receiver))
+            existing = self.receivers.get(lookup_key)
+            if existing is not None:
+                if existing() is not None:
+                    return
+                # Drop the dead entry so the new one goes last, as it does in
+                # the snapshot.
+                del self.receivers[lookup_key]
+                self._snapshot_remove(lookup_key)
+            self.receivers[lookup_key] = receiver
+            self._snapshot_append(lookup_key, receiver)
         finally:
             self.lock.release()
 
@@ -112,17 +223,38 @@ class Signal(object):
             lookup_key = (dispatch_uid, _make_id(sender))
         else:
             lookup_key = (_make_id(receiver), _make_id(sender))
-        
+
+        if lookup_key not in self.receivers:
+            return
+
         self.lock.acquire()
         try:
-            for index in xrange(len(self.receivers)):
-                (r_key, _) = self.receivers[index]
-                if r_key == lookup_key:
-                    del self.receivers[index]
-                    break
+            if lookup_key in self.receivers:
+                del self.receivers[lookup_key]
+                self._snapshot_remove(lookup_key)
         finally:
             self.lock.release()
 
+    def has_listeners(self, sender=None):
+        """
+        Return True if sending from sender would reach any receivers.
+
+        Lets emitters skip building expensive arguments when nobody is
+        listening::
+
+            if signal.has_listeners(sender):
+                signal.send(sender, expensive=compute())
+
+        A weak receiver that has died but has not been swept out yet still
+        counts as a listener.
+        """
+        senderkey = _make_id(sender)
+        (keys, sender_keys, refs), buckets = self._snapshot
+        if buckets is None:
+            return _NONE_ID in sender_keys or senderkey in sender_keys
+        any_group, by_sender = buckets
+        return bool(any_group[0]) or senderkey in by_sender
+
     def send(self, sender, **named):
         """
         Send signal from sender to all connected receivers.
@@ -139,15 +271,20 @@ class Signal(object):
             named
                 Named arguments which will be passed to receivers.
 
-        Returns a list of tuple pairs [(receiver, response), ... ].
+        Returns a list of tuple pairs [(receiver, response), ... ]. May raise
+        DispatcherKeyError if the signal validates its arguments.
         """
+        if self._validate:
+            self._check_args(named)
+
         responses = []
         if not self.receivers:
             return responses
 
+        append = responses.append
         for receiver in self._live_receivers(_make_id(sender)):
             response = receiver(signal=self, sender=sender, **named)
-            responses.append((receiver, response))
+            append((receiver, response))
         return responses
 
     def send_robust(self, sender, **named):
@@ -167,69 +304,177 @@ class Signal(object):
                 providing_args.
 
         Return a list of tuple pairs [(receiver, response), ... ]. May raise
-        DispatcherKeyError.
+        DispatcherKeyError if the signal validates its arguments.
 
         If any receiver raises an error (specifically any subclass of
         Exception), the error instance is returned as the result for that
         receiver.
         """
+        if self._validate:
+            self._check_args(named)
+
         responses = []
         if not self.receivers:
             return responses
 
         # Call each receiver with whatever arguments it can accept.
         # Return a list of tuple pairs [(receiver, response), ... ].
+        append = responses.append
         for receiver in self._live_receivers(_make_id(sender)):
             try:
                 response = receiver(signal=self, sender=sender, **named)
-            except Exception, err:
-                responses.append((receiver, err))
+            except Exception as err:
+                append((receiver, err))
             else:
-                responses.append((receiver, response))
+                append((receiver, response))
         return responses
 
+    def _check_args(self, named):
+        """
+        Raise DispatcherKeyError for arguments not in providing_args.
+        """
+        unexpected = [name for name in named if name not in self.providing_args]
+        if unexpected:
+            raise DispatcherKeyError(
+                "Signal does not provide argument(s): %s"
+                % ", ".join(sorted(unexpected)))
+
     def _live_receivers(self, senderkey):
         """
         Filter sequence of receivers to get resolved, live receivers.
 
         This checks for weak references and resolves them, then returning only
-        live receivers.
-        """
-        none_senderkey = _make_id(None)
-        receivers = []
-
-        for (receiverkey, r_senderkey), receiver in self.receivers:
-            if r_senderkey == none_senderkey or r_senderkey == senderkey:
-                if isinstance(receiver, WEAKREF_TYPES):
-                    # Dereference the weak reference.
-                    receiver = receiver()
-                    if receiver is not None:
-                        receivers.append(receiver)
-                else:
-                    receivers.append(receiver)
-        return receivers
+        live receivers, in connection order.
+        """
+        keys, refs = self._select(senderkey)
+        receivers = [ref() for ref in refs]
+        # Test by identity: 'None in receivers' would call each receiver's
+        # __eq__, which may be overridden.
+        for receiver in receivers:
+            if receiver is None:
+                break
+        else:
+            return receivers
+
+        # Some weak references have died; drop them here and from receivers.
+        self._remove_receivers([(keys[i], refs[i])
+                                for i, receiver in enumerate(receivers)
+                                if receiver is None])
+        return [receiver for receiver in receivers if receiver is not None]
 
-    def _remove_receiver(self, receiver):
+    def _select(self, senderkey):
         """
-        Remove dead receivers from connections.
+        Return (lookup keys, weakref(receiver)s) for the receivers that match
+        senderkey in the current snapshot.
+        """
+        snapshot = self._snapshot
+        (keys, sender_keys, refs), buckets = snapshot
+        if buckets is not None:
+            any_group, by_sender = buckets
+            return by_sender.get(senderkey, any_group)
+
+        cache = self._send_cache
+        cached = cache.get(senderkey)
+        if cached is not None and cached[0] is snapshot:
+            return cached[1]
+
+        indexes = [i for i, r_senderkey in enumerate(sender_keys)
+                   if r_senderkey == _NONE_ID or r_senderkey == senderkey]
+        selected = (tuple([keys[i] for i in indexes]),
+                    tuple([refs[i] for i in indexes]))
+
+        if len(cache) >= self._SEND_CACHE_SIZE:
+            cache.clear()
+        cache[senderkey] = (snapshot, selected)
+        return selected
+
+    def _remove_receivers(self, dead):
         """
+        Remove dead receivers from connections.
 
+        dead is a sequence of (lookup key, weakref) pairs as found in the
+        snapshot; an entry is only removed if it has not since been replaced.
+        """
         self.lock.acquire()
         try:
-            to_remove = []
-            for key, connected_receiver in self.receivers:
-                if connected_receiver == receiver:
-                    to_remove.append(key)
-            for key in to_remove:
-                last_idx = len(self.receivers) - 1
-                # enumerate in reverse order so that indexes are valid even
-                # after we delete some items
-                for idx, (r_key, _) in enumerate(reversed(self.receivers)):
-                    if r_key == key:
-                        del self.receivers[last_idx-idx]
+            for lookup_key, ref in dead:
+                if self.receivers.get(lookup_key) is ref:
+                    del self.receivers[lookup_key]
+                    self._snapshot_remove(lookup_key)
         finally:
             self.lock.release()
 
+    def _snapshot_append(self, lookup_key, ref):
+        """
+        Publish a snapshot with a newly connected receiver added last.
+
+        Must be called with the lock held. The snapshot is replaced, never
+        mutated, so readers holding the previous one are unaffected. Only
+        the tuples the receiver belongs in are copied.
+        """
+        (keys, sender_keys, refs), buckets = self._snapshot
+        senderkey = lookup_key[1]
+        keys += (lookup_key,)
+        sender_keys += (senderkey,)
+        refs += (ref,)
+
+        if buckets is not None:
+            any_group, by_sender = buckets
+            if senderkey == _NONE_ID:
+                any_group = _group_append(any_group, lookup_key, ref)
+                by_sender = dict((key, _group_append(group, lookup_key, ref))
+                                 for key, group in by_sender.items())
+            else:
+                by_sender = by_sender.copy()
+                by_sender[senderkey] = _group_append(
+                    by_sender.get(senderkey, any_group), lookup_key, ref)
+            buckets = (any_group, by_sender)
+        elif len(keys) > self._SMALL_THRESHOLD:
+            buckets = _make_buckets(keys, refs)
+
+        self._snapshot = ((keys, sender_keys, refs), buckets)
+        self._send_cache = {}
+
+    def _snapshot_remove(self, lookup_key):
+        """
+        Publish a snapshot without the receiver connected under lookup_key.
+
+        Must be called with the lock held, after lookup_key has been removed
+        from receivers.
+        """
+        (keys, sender_keys, refs), buckets = self._snapshot
+        i = keys.index(lookup_key)
+        keys = keys[:i] + keys[i + 1:]
+        sender_keys = sender_keys[:i] + sender_keys[i + 1:]
+        refs = refs[:i] + refs[i + 1:]
+
+        if not keys:
+            self._snapshot = _EMPTY_SNAPSHOT
+            self._send_cache = {}
+            return
+
+        if len(keys) <= self._SMALL_THRESHOLD:
+            buckets = None
+        elif buckets is not None:
+            any_group, by_sender = buckets
+            senderkey = lookup_key[1]
+            if senderkey == _NONE_ID:
+                any_group = _group_remove(any_group, lookup_key)
+                by_sender = dict((key, _group_remove(group, lookup_key))
+                                 for key, group in by_sender.items())
+            else:
+                by_sender = by_sender.copy()
+                group = _group_remove(by_sender[senderkey], lookup_key)
+                if len(group[0]) > len(any_group[0]):
+                    by_sender[senderkey] = group
+                else:
+                    # Only any-sender receivers are left for this sender.
+                    del by_sender[senderkey]
+            buckets = (any_group, by_sender)
+
+        self._snapshot = ((keys, sender_keys, refs), buckets)
+        self._send_cache = {}
+
 
 def receiver(signal, **kwargs):
     """
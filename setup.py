@@ -79,6 +79,8 @@ setup(
         "Development Status :: 4 - Beta",
         "Operating System :: OS Independent",
         "Programming Language :: Python",
+        "Programming Language :: Python :: 2",
+        "Programming Language :: Python :: 3",
         "License :: OSI Approved :: BSD License",
         "Intended Audience :: Developers",
         "Topic :: Software Development :: Libraries :: Python Modules",
@@ -0,0 +1,253 @@
+import gc
+import random
+import sys
+import threading
+import unittest
+
+from dispatch import DispatcherKeyError, Signal
+
+
+def receiver_1(**kwargs):
+    return 1
+
+
+def receiver_2(**kwargs):
+    return 2
+
+
+def responses(results):
+    return [response for _, response in results]
+
+
+class Receiver(object):
+
+    def method(self, **kwargs):
+        return 'method'
+
+
+class UncomparableReceiver(object):
+
+    def __call__(self, **kwargs):
+        return 'uncomparable'
+
+    def __eq__(self, other):
+        raise AssertionError('receivers must not be compared')
+
+    __hash__ = object.__hash__
+
+
+class ConcurrentWriterTest(unittest.TestCase):
+
+    def test_snapshot_matches_receivers_after_concurrent_writes(self):
+        signal = Signal()
+        receivers = [lambda i=i, **kwargs: i for i in range(20)]
+        senders = [object(), object(), None]
+
+        def worker(seed):
+            rand = random.Random(seed)
+            for _ in range(500):
+                receiver = rand.choice(receivers)
+                sender = rand.choice(senders)
+                choice = rand.random()
+                if choice < 0.4:
+                    signal.connect(receiver, sender=sender)
+                elif choice < 0.7:
+                    signal.disconnect(receiver, sender=sender)
+                else:
+                    signal.send(sender)
+
+        if hasattr(sys, 'setswitchinterval'):
+            interval = sys.getswitchinterval()
+            sys.setswitchinterval(1e-6)
+            self.addCleanup(sys.setswitchinterval, interval)
+        threads = [threading.Thread(target=worker, args=(seed,))
+                   for seed in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        (keys, _, _), _ = signal._snapshot
+        self.assertEqual(list(keys), list(signal.receivers))
+
+
+class SnapshotUpdateTest(unittest.TestCase):
+
+    def test_sends_match_connections_through_random_changes(self):
+        # With 12 possible connections the signal keeps crossing
+        # _SMALL_THRESHOLD. Every sender is checked against a plain list of
+        # (receiver, sender) pairs in connection order.
+        rand = random.Random(0)
+        signal = Signal()
+        senders = [None, object(), object(), object()]
+        receivers = [lambda i=i, **kwargs: i for i in range(3)]
+        connected = []
+        for _ in range(2000):
+            receiver = rand.choice(receivers)
+            sender = rand.choice(senders)
+            if (receiver, sender) in connected:
+                signal.disconnect(receiver, sender=sender)
+                connected.remove((receiver, sender))
+            else:
+                signal.connect(receiver, sender=sender)
+                connected.append((receiver, sender))
+            for sender in senders:
+                expected = [receiver() for receiver, r_sender in connected
+                            if r_sender is None or r_sender is sender]
+                self.assertEqual(responses(signal.send(sender)), expected)
+                self.assertEqual(signal.has_listeners(sender), bool(expected))
+
+
+class DispatchOrderTest(unittest.TestCase):
+
+    def test_connection_order_across_sender_buckets(self):
+        sender = object()
+        for padding in (0, Signal._SMALL_THRESHOLD + 1):
+            signal = Signal()
+            for _ in range(padding):
+                signal.connect(lambda **kwargs: None, sender=object(),
+                               weak=False)
+            signal.connect(lambda **kwargs: 'a', sender=sender, weak=False)
+            signal.connect(lambda **kwargs: 'b', weak=False)
+            signal.connect(lambda **kwargs: 'c', sender=sender, weak=False)
+            self.assertEqual(
+                [response for _, response in signal.send(sender)],
+                ['a', 'b', 'c'])
+
+
+class DeadReceiverTest(unittest.TestCase):
+
+    def test_dead_function_is_skipped_and_pruned(self):
+        signal = Signal()
+        signal.connect(receiver_1)
+
+        def temporary(**kwargs):
+            return 'temporary'
+
+        signal.connect(temporary)
+        del temporary
+        gc.collect()
+        self.assertEqual(len(signal.receivers), 2)
+        self.assertEqual(responses(signal.send(None)), [1])
+        self.assertEqual(len(signal.receivers), 1)
+
+    def test_dead_bound_method_is_skipped_and_pruned(self):
+        signal = Signal()
+        obj = Receiver()
+        signal.connect(obj.method)
+        signal.connect(receiver_1)
+        del obj
+        gc.collect()
+        self.assertEqual(len(signal.receivers), 2)
+        self.assertEqual(responses(signal.send(None)), [1])
+        self.assertEqual(len(signal.receivers), 1)
+
+    def test_connect_replaces_dead_entry_under_same_key(self):
+        signal = Signal()
+
+        def temporary(**kwargs):
+            return 'temporary'
+
+        signal.connect(temporary, dispatch_uid='uid')
+        del temporary
+        gc.collect()
+        signal.connect(receiver_1, dispatch_uid='uid')
+        self.assertEqual(len(signal.receivers), 1)
+        self.assertEqual(responses(signal.send(None)), [1])
+
+    def test_receivers_are_not_compared(self):
+        signal = Signal()
+        receiver = UncomparableReceiver()
+        signal.connect(receiver)
+        signal.connect(receiver_1)
+        for send in (signal.send, signal.send_robust):
+            self.assertEqual(responses(send(None)), ['uncomparable', 1])
+
+    def test_receivers_are_not_compared_with_dead_receiver(self):
+        signal = Signal()
+        receiver = UncomparableReceiver()
+        signal.connect(receiver)
+        for send in (signal.send, signal.send_robust):
+
+            def temporary(**kwargs):
+                return 'temporary'
+
+            signal.connect(temporary)
+            del temporary
+            gc.collect()
+            self.assertEqual(responses(send(None)), ['uncomparable'])
+
+
+class HasListenersTest(unittest.TestCase):
+
+    def padded_signals(self):
+        """Yield an empty signal and one past _SMALL_THRESHOLD receivers."""
+        # Keep the padding senders alive so their ids are not reused.
+        self.padding_senders = [object()
+                                for _ in range(Signal._SMALL_THRESHOLD + 1)]
+        for padding in (0, Signal._SMALL_THRESHOLD + 1):
+            signal = Signal()
+            for sender in self.padding_senders[:padding]:
+                signal.connect(receiver_2, sender=sender)
+            yield signal
+
+    def test_specific_sender(self):
+        sender, other = object(), object()
+        for signal in self.padded_signals():
+            self.assertFalse(signal.has_listeners(sender))
+            signal.connect(receiver_1, sender=sender)
+            self.assertTrue(signal.has_listeners(sender))
+            self.assertFalse(signal.has_listeners(other))
+            self.assertFalse(signal.has_listeners())
+
+    def test_any_sender(self):
+        sender = object()
+        for signal in self.padded_signals():
+            self.assertFalse(signal.has_listeners())
+            signal.connect(receiver_1)
+            self.assertTrue(signal.has_listeners())
+            self.assertTrue(signal.has_listeners(sender))
+
+    def test_dead_but_unswept_receiver_still_counts(self):
+        for signal in self.padded_signals():
+
+            def temporary(**kwargs):
+                return 'temporary'
+
+            signal.connect(temporary)
+            del temporary
+            gc.collect()
+            self.assertTrue(signal.has_listeners())
+            signal.send(None)
+            self.assertFalse(signal.has_listeners())
+
+
+class ProvidingArgsTest(unittest.TestCase):
+
+    def test_providing_args_is_frozenset(self):
+        self.assertEqual(Signal().providing_args, frozenset())
+        signal = Signal(providing_args=['a', 'b'])
+        self.assertIsInstance(signal.providing_args, frozenset)
+        self.assertEqual(signal.providing_args, frozenset(['a', 'b']))
+
+    def test_dispatcher_key_error_is_key_error(self):
+        self.assertTrue(issubclass(DispatcherKeyError, KeyError))
+
+    @unittest.skipUnless(__debug__, 'validation is skipped under -O')
+    def test_validate_rejects_unexpected_arguments(self):
+        signal = Signal(providing_args=['a'], validate=True)
+        signal.connect(receiver_1)
+        for send in (signal.send, signal.send_robust):
+            self.assertEqual(responses(send(None, a=1)), [1])
+            self.assertRaises(DispatcherKeyError, send, None, b=1)
+            self.assertRaises(KeyError, send, None, a=1, b=1)
+
+    def test_no_validation_by_default(self):
+        signal = Signal(providing_args=['a'])
+        signal.connect(receiver_1)
+        for send in (signal.send, signal.send_robust):
+            self.assertEqual(responses(send(None, b=1)), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()